@@ -12,28 +12,77 @@
 # ==========================
 # استيراد مكتبة الوقت
 import time
+# استيراد مكتبة asyncio لحلقة الأحداث الرئيسية
+import asyncio
+# استيراد مكتبة signal لإيقاف الخدمة بسلاسة
+import signal
+# استيراد مكتبة socket لإرسال حالة الخدمة إلى systemd
+import socket
 # استيراد مكتبة shutil للتحقق من وجود الأوامر
 import shutil
 # استيراد مكتبة subprocess لاستدعاء الأوامر الخارجية
 import subprocess
 # استيراد مكتبة os للتعامل مع نظام الملفات
 import os
-# استيراد مكتبة argparse لتحليل وسائط سطر الأوامر
-import argparse
 # استيراد مكتبة sys للتعامل مع النظام
 import sys
+# استيراد مكتبة atexit لإغلاق الواصفات عند الخروج
+import atexit
 # استيراد مكتبة logging لتسجيل الأحداث
 import logging
+# استيراد RotatingFileHandler لتدوير السجل تلقائيًا
+from logging.handlers import RotatingFileHandler
+# استيراد مكتبة select لمراقبة POLLPRI على سمات sysfs
+import select
+# استيراد ctypes لاستدعاء inotify من libc مباشرة
+import ctypes
+import ctypes.util
+# استيراد struct لتحليل أحداث inotify
+import struct
 # استيراد مكتبة pathlib للتعامل مع مسارات الملفات
 from pathlib import Path
+# استيراد SimpleNamespace لحمل وسائط سطر الأوامر
+from types import SimpleNamespace
+# استيراد array لتخزين قراءات البطاريات في مصفوفات متجاورة
+from array import array
 # استيراد أنواع البيانات من typing
 from typing import List, Dict, Optional, Tuple
 
+# استيراد dbus-next (اختياري) لوضع الأحداث عبر UPower
+try:
+    from dbus_next import BusType, Message, MessageType
+    from dbus_next.aio import MessageBus
+    HAVE_DBUS = True
+except ImportError:
+    HAVE_DBUS = False
+
+# استيراد systemd.daemon (اختياري) لإبلاغ systemd بالجاهزية ونبض المراقبة
+try:
+    from systemd import daemon as sd_daemon
+    HAVE_SYSTEMD = True
+except ImportError:
+    HAVE_SYSTEMD = False
+
+# استيراد libnotify عبر gi (اختياري) لإرسال الإشعارات دون تشغيل عملية جديدة
+try:
+    import gi
+    gi.require_version("Notify", "0.7")
+    from gi.repository import Notify
+    HAVE_GI = True
+except (ImportError, ValueError):
+    HAVE_GI = False
+
 # ==========================
 # إعدادات افتراضية وثوابت
 # ==========================
 # فترة التحقق الافتراضية بالثواني
 DEFAULT_CHECK_INTERVAL = 60  # ثانية
+# مهلة الإشعار الافتراضية بالميلي ثانية
+DEFAULT_NOTIFY_TIMEOUT_MS = 8000
+# عدد الأسطر الافتراضي عند --show-log
+DEFAULT_TAIL_LINES = 100
+# مسار ملف السجل الافتراضي
+DEFAULT_LOG_PATH = str(Path.home() / "battery_monitor.log")
 # عتبات النسبة المئوية للبطارية
 LOW_THRESHOLD = 20
 HIGH_THRESHOLD = 85
@@ -52,26 +101,88 @@ ICONS = {
 # ==========================
 # معالج CLI
 # ==========================
-parser = argparse.ArgumentParser(description="مراقب بطارية مع إشعارات وسجل")
-# إضافة الوسائط
-parser.add_argument("--interval", "-i", type=int, default=DEFAULT_CHECK_INTERVAL,
-                    help="فترة التحقق بالثواني (default: %(default)s)")
-parser.add_argument("--timeout", "-t", type=int, default=8000,
-                    help="مهلة الإشعار بالميلي ثانية (notify-send -t) الافتراضية")
-parser.add_argument("--no-log-file", action="store_true",
-                    help="عدم كتابة ملف السجل")
-parser.add_argument("--print-log", action="store_true",
-                    help="طباعة السجل إلى stdout أثناء التشغيل")
-parser.add_argument("--show-log", action="store_true",
-                    help="طباعة سجل الأحداث ثم الخروج")
-parser.add_argument("--tail", nargs='?', const=100, type=int, default=100,
-                    help="عدد الأسطر الأخيرة للطباعة عند --show-log")
-parser.add_argument("--log-path", "-l", type=str,
-                    default=str(Path.home() / "battery_monitor.log"),
-                    help="مسار ملف السجل")
-parser.add_argument("--no-notify", action="store_true",
-                    help="عدم استدعاء notify-send (مفيد للاختبار)")
-args = parser.parse_args()
+# دالة لبناء محلل argparse الكامل (يُستورد فقط عند --help أو وسائط غير مألوفة)
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="مراقب بطارية مع إشعارات وسجل")
+    # إضافة الوسائط
+    parser.add_argument("--interval", "-i", type=int, default=DEFAULT_CHECK_INTERVAL,
+                        help="فترة التحقق بالثواني (default: %(default)s)")
+    parser.add_argument("--timeout", "-t", type=int, default=DEFAULT_NOTIFY_TIMEOUT_MS,
+                        help="مهلة الإشعار بالميلي ثانية (notify-send -t) الافتراضية")
+    parser.add_argument("--no-log-file", action="store_true",
+                        help="عدم كتابة ملف السجل")
+    parser.add_argument("--print-log", action="store_true",
+                        help="طباعة السجل إلى stdout أثناء التشغيل")
+    parser.add_argument("--show-log", action="store_true",
+                        help="طباعة سجل الأحداث ثم الخروج")
+    parser.add_argument("--tail", nargs='?', const=DEFAULT_TAIL_LINES, type=int, default=DEFAULT_TAIL_LINES,
+                        help="عدد الأسطر الأخيرة للطباعة عند --show-log")
+    parser.add_argument("--log-path", "-l", type=str,
+                        default=DEFAULT_LOG_PATH,
+                        help="مسار ملف السجل")
+    parser.add_argument("--no-notify", action="store_true",
+                        help="عدم استدعاء notify-send (مفيد للاختبار)")
+    parser.add_argument("--event-driven", action="store_true",
+                        help="الاستيقاظ على إشارات UPower عبر D-Bus بدل الفحص الدوري (يتطلب dbus-next)")
+    return parser
+
+# الأعلام البسيطة → اسم الخاصية
+ARGV_FLAGS = {
+    "--no-log-file": "no_log_file",
+    "--print-log": "print_log",
+    "--show-log": "show_log",
+    "--no-notify": "no_notify",
+    "--event-driven": "event_driven",
+}
+# الخيارات ذات القيمة → (اسم الخاصية، المحوِّل)
+ARGV_OPTIONS = {
+    "--interval": ("interval", int), "-i": ("interval", int),
+    "--timeout": ("timeout", int), "-t": ("timeout", int),
+    "--log-path": ("log_path", str), "-l": ("log_path", str),
+    "--tail": ("tail", int),
+}
+
+# دالة لتحليل sys.argv بمرور واحد؛ تُرجع None لأي شيء غير مألوف ليتولاه argparse
+def _parse_argv(argv: List[str]) -> Optional[SimpleNamespace]:
+    ns = SimpleNamespace(interval=DEFAULT_CHECK_INTERVAL, timeout=DEFAULT_NOTIFY_TIMEOUT_MS,
+                         no_log_file=False, print_log=False, show_log=False,
+                         tail=DEFAULT_TAIL_LINES, log_path=DEFAULT_LOG_PATH,
+                         no_notify=False, event_driven=False)
+    i = 0
+    while i < len(argv):
+        tok = argv[i]
+        i += 1
+        if tok in ARGV_FLAGS:
+            setattr(ns, ARGV_FLAGS[tok], True)
+            continue
+        # --opt=value أو -i30 أو --opt value
+        name, eq, value = tok.partition("=")
+        if name not in ARGV_OPTIONS and tok[:2] in ARGV_OPTIONS and len(tok) > 2:
+            name, eq, value = tok[:2], "=", tok[2:]
+        if name not in ARGV_OPTIONS:
+            return None
+        attr, conv = ARGV_OPTIONS[name]
+        if not eq:
+            if i < len(argv) and not argv[i].startswith("-"):
+                value = argv[i]
+                i += 1
+            elif name == "--tail":
+                # --tail دون قيمة → القيمة الافتراضية
+                value = str(DEFAULT_TAIL_LINES)
+            else:
+                return None
+        try:
+            setattr(ns, attr, conv(value))
+        except ValueError:
+            return None
+    return ns
+
+# المسار السريع دون argparse؛ argparse يتولى --help ورسائل الخطأ
+_argv = sys.argv[1:]
+args = None if ("-h" in _argv or "--help" in _argv) else _parse_argv(_argv)
+if args is None:
+    args = build_parser().parse_args(_argv)
 # ==========================
 # إعدادات التشغيل
 # ==========================
@@ -80,6 +191,8 @@ CHECK_INTERVAL = max(1, args.interval)
 DEFAULT_TIMEOUT_MS = int(args.timeout)
 # تحديد مسار ملف السجل
 LOG_PATH = None if args.no_log_file else args.log_path
+# كائن المسار يُبنى مرة واحدة
+LOG_PATH_OBJ = Path(LOG_PATH) if LOG_PATH else None
 
 # ==========================
 # إعداد الـ Logging
@@ -95,20 +208,23 @@ formatter = logging.Formatter("[%(asctime)s] %(message)s")
 if LOG_PATH:
     try:
         # إن لم يكن مجلد المسار موجودًا حاول إنشاؤه (قد يفشل لصلاحية)
-        parent = Path(LOG_PATH).parent
+        parent = LOG_PATH_OBJ.parent
         if not parent.exists():
             parent.mkdir(parents=True, exist_ok=True)
-        fh = logging.FileHandler(LOG_PATH, encoding="utf-8")
+        # تدوير تلقائي عند تجاوز 1 ميجابايت مع نسخة احتياطية واحدة (.1)
+        # (يُفتح الملف هنا ليظهر أي خطأ صلاحيات فورًا ويعمل التراجع إلى stdout)
+        fh = RotatingFileHandler(LOG_PATH, maxBytes=1_000_000, backupCount=1,
+                                 encoding="utf-8")
         fh.setLevel(logging.INFO)
         fh.setFormatter(formatter)
         logger.addHandler(fh)
     except PermissionError:
         # فشل بسبب صلاحيات → التراجع للكتابة إلى stdout فقط
         print(f"⚠️  Permission denied for log file {LOG_PATH}; falling back to stdout.", file=sys.stderr)
-        LOG_PATH = None
+        LOG_PATH = LOG_PATH_OBJ = None
     except Exception as e:
         print(f"⚠️  Failed to set up file logging ({LOG_PATH}): {e}; falling back to stdout.", file=sys.stderr)
-        LOG_PATH = None
+        LOG_PATH = LOG_PATH_OBJ = None
 
 # إضافة StreamHandler للطباعة إلى stdout إذا طُلب ذلك أو لم يتم إعداد ملف السجل
 if args.print_log or not LOG_PATH:
@@ -122,22 +238,37 @@ if args.print_log or not LOG_PATH:
 # ==========================
 # دالة مساعدة لتسجيل الرسائل
 # ==========================
-def log(msg: str) -> None:
-    logger.info(msg)
+# التنسيق مؤجل (نمط %) ولا يتم إلا إذا كان مستوى INFO مفعّلًا
+def log(msg: str, *a) -> None:
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(msg, *a)
 
 # ==========================
 # عرض السجل ثم الخروج
 # ==========================
 if args.show_log:
     # التحقق من وجود ملف السجل
-    if not LOG_PATH or not Path(LOG_PATH).exists():
+    if not LOG_PATH_OBJ or not LOG_PATH_OBJ.exists():
         print("لا يوجد ملف سجل مفعّل أو غير موجود.")
         sys.exit(0)
     try:
-        # قراءة وطباعة الأسطر الأخيرة من ملف السجل
-        lines = Path(LOG_PATH).read_text(encoding="utf-8").splitlines()
+        # قراءة الأسطر الأخيرة فقط: القفز إلى قرب نهاية الملف (~256 بايت لكل سطر)
+        with open(LOG_PATH_OBJ, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            guess = min(size, args.tail * 256) if args.tail > 0 else size
+            f.seek(size - guess)
+            lines = f.read().splitlines()
+            if guess < size:
+                # السطر الأول قد يكون مقطوعًا؛ وإن لم يكفِ التقدير نقرأ الملف كاملًا
+                lines = lines[1:]
+                if len(lines) < args.tail:
+                    f.seek(0)
+                    lines = f.read().splitlines()
+        # طباعة البايتات كما هي دون فك ترميز الأسطر المُهملة
+        out = sys.stdout.buffer
         for line in lines[-args.tail:]:
-            print(line)
+            out.write(line + b"\n")
+        out.flush()
     except Exception as e:
         print(f"خطأ أثناء قراءة السجل: {e}", file=sys.stderr)
     sys.exit(0)
@@ -153,10 +284,10 @@ def detect_power_devices() -> Tuple[List[Path], List[Path]]:
     if not base.exists():
         log("⚠️  /sys/class/power_supply غير موجود — هل هذا جهاز لوحي؟")
         return [], []
-    # كشف البطاريات 
-    bats = [p for p in base.iterdir() if p.name.lower().startswith("bat")]
+    # كشف البطاريات (بترتيب ثابت لأن حالة كل بطارية مرتبطة بموضعها)
+    bats = sorted(p for p in base.iterdir() if p.name.lower().startswith("bat"))
     # كشف محولات التيار المتردد
-    acs = [p for p in base.iterdir() if p.name.lower().startswith(("ac", "acadapter", "ac0", "adapter"))]
+    acs = sorted(p for p in base.iterdir() if p.name.lower().startswith(("ac", "acadapter", "ac0", "adapter")))
     # إرجاع القوائم
     return bats, acs
 # ==========================
@@ -170,60 +301,306 @@ if not BATTERIES:
     log("❌ لا توجد بطاريات متصلة — الخروج.")
     sys.exit(1)
 
+# ==========================
+# مراقبة uevent عبر inotify
+# ==========================
+# أعلام inotify من <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+# ترويسة struct inotify_event: wd, mask, cookie, len
+INOTIFY_EVENT = struct.Struct("iIII")
+# رقم المراقبة → مسار الجهاز
+INOTIFY_WDS: Dict[int, Path] = {}
+# أسماء البطاريات الحالية (تتغير فقط عند إضافة/إزالة جهاز طاقة)
+BATTERY_NAMES = frozenset(b.name for b in BATTERIES)
+# رقم مراقبة مجلد power_supply، ويُرفع العلم عند إضافة/إزالة جهاز
+TOPOLOGY_WD = -1
+TOPOLOGY_DIRTY = False
+# مكتبة libc (تُحمّل عند تهيئة inotify)
+LIBC = None
+
+# دالة لإنشاء واصف inotify ومراقبة مجلد أجهزة الطاقة
+def init_inotify() -> Optional[int]:
+    global LIBC, TOPOLOGY_WD
+    try:
+        LIBC = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = LIBC.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+    except (OSError, AttributeError) as e:
+        log(f"⚠️  inotify غير متاح ({e}) — الاكتفاء بالفحص الدوري")
+        return None
+    # مراقبة إضافة/إزالة الأجهزة
+    if BATTERIES:
+        TOPOLOGY_WD = LIBC.inotify_add_watch(fd, os.fsencode(str(BATTERIES[0].parent)),
+                                             IN_CREATE | IN_DELETE)
+    return fd
+
+# دالة لمراقبة ملف uevent لكل جهاز طاقة (إضافة مراقبة موجودة لا تُكررها)
+def watch_power_devices(devices: List[Path]) -> None:
+    if INOTIFY_FD is None:
+        return
+    for dev in devices:
+        wd = LIBC.inotify_add_watch(INOTIFY_FD, os.fsencode(str(dev / "uevent")), IN_MODIFY | IN_CLOSE_WRITE)
+        if wd < 0:
+            log(f"⚠️  تعذر مراقبة {dev}/uevent: {os.strerror(ctypes.get_errno())}")
+        else:
+            INOTIFY_WDS[wd] = dev
+
+INOTIFY_FD = init_inotify()
+watch_power_devices(BATTERIES + AC_ADAPTERS)
+
+# دالة لتفريغ أحداث inotify المتراكمة (تُستدعى عندما يصبح الواصف قابلًا للقراءة)
+def drain_inotify() -> None:
+    global TOPOLOGY_DIRTY
+    try:
+        while True:
+            buf = os.read(INOTIFY_FD, 4096)
+            if not buf:
+                break
+            # إبطال حالة المحول المخزنة إذا جاء الحدث من محول تيار
+            off = 0
+            while off < len(buf):
+                wd, _, _, name_len = INOTIFY_EVENT.unpack_from(buf, off)
+                off += INOTIFY_EVENT.size + name_len
+                if wd == TOPOLOGY_WD:
+                    TOPOLOGY_DIRTY = True
+                elif INOTIFY_WDS.get(wd) in AC_ADAPTERS:
+                    invalidate_ac_cache()
+    except BlockingIOError:
+        pass
+
 # ==========================
 # قراءة البيانات من sysfs
 # ==========================
-# دالة لقراءة ملف نصي بأمان
-def safe_read(path: Path, fname: str) -> Optional[str]:
+# واصفات ملفات sysfs المفتوحة بشكل دائم: (الجهاز، السمة) → fd
+SYSFS_FDS: Dict[Tuple[Path, str], int] = {}
+# مجموعة epoll تنتظر POLLPRI|POLLERR (تُطلقها النواة عند sysfs_notify على السمة)
+SYSFS_POLL = select.epoll()
+# واصف مُسجّل في epoll → (الجهاز، السمة)
+SYSFS_POLLED: Dict[int, Tuple[Path, str]] = {}
+
+# دالة لفتح سمة sysfs وحفظ واصفها وتسجيله لمراقبة التغيير
+def _open_attr(path: Path, fname: str) -> int:
+    fd = os.open(str(path / fname), os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    SYSFS_FDS[(path, fname)] = fd
+    try:
+        SYSFS_POLL.register(fd, select.EPOLLPRI | select.EPOLLERR)
+        SYSFS_POLLED[fd] = (path, fname)
+    except OSError:
+        # الملف لا يدعم poll → الاعتماد على inotify والمؤقت
+        pass
+    return fd
+
+# دالة لإغلاق واصف سمة وإزالته من الذاكرة المؤقتة
+def _close_attr(key: Tuple[Path, str]) -> None:
+    fd = SYSFS_FDS.pop(key, None)
+    if fd is not None:
+        SYSFS_POLLED.pop(fd, None)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+# مخزن قراءة واحد يُعاد استخدامه لكل السمات (لا تخصيص bytes في كل دورة)
+_BUF = bytearray(64)
+_MV = memoryview(_BUF)
+
+# دالة لقراءة سمة عبر واصف مفتوح مسبقًا إلى _BUF؛ تُرجع عدد البايتات
+def _read_attr(path: Path, fname: str) -> int:
+    key = (path, fname)
+    fd = SYSFS_FDS.get(key)
+    if fd is None:
+        fd = _open_attr(path, fname)
+    try:
+        return os.preadv(fd, [_MV], 0)
+    except OSError:
+        # الواصف لم يعد صالحًا (مثل نزع البطارية) → إعادة الفتح مرة واحدة
+        _close_attr(key)
+        return os.preadv(_open_attr(path, fname), [_MV], 0)
+
+# دالة لإغلاق جميع واصفات sysfs عند الخروج
+def close_sysfs_fds() -> None:
+    for key in list(SYSFS_FDS):
+        _close_attr(key)
+
+atexit.register(close_sysfs_fds)
+
+# دالة لفتح جميع السمات المراقبة مسبقًا (حتى تُسجّل في epoll قبل أول انتظار)
+def open_sysfs_attrs() -> None:
+    attrs = [(bat, "capacity") for bat in BATTERIES] + [(bat, "status") for bat in BATTERIES]
+    attrs += [(a, "online") for a in AC_ADAPTERS]
+    for path, fname in attrs:
+        if (path, fname) not in SYSFS_FDS:
+            try:
+                _open_attr(path, fname)
+            except OSError as e:
+                log(f"⚠️  تعذر فتح {path}/{fname}: {e}")
+
+# دالة لمعالجة السمات التي أبلغت عن تغيير (تُستدعى عندما يصبح واصف epoll قابلًا للقراءة)
+def drain_sysfs_poll() -> None:
+    for fd, _ in SYSFS_POLL.poll(0):
+        key = SYSFS_POLLED.get(fd)
+        if key is None:
+            continue
+        # إعادة القراءة من البداية تُعيد تسليح POLLPRI (sysfs ملف وهمي)
+        try:
+            os.preadv(fd, [_MV], 0)
+        except OSError:
+            # الجهاز أُزيل → التوقف عن مراقبة الواصف لتجنب تكرار POLLERR
+            SYSFS_POLL.unregister(fd)
+            SYSFS_POLLED.pop(fd, None)
+        if key[0] in AC_ADAPTERS:
+            invalidate_ac_cache()
+
+# دالة لقراءة سمة إلى _BUF بأمان؛ تُرجع عدد البايتات أو -1 عند الخطأ
+def safe_read_raw(path: Path, fname: str) -> int:
     try:
-        return (path / fname).read_text().strip()
+        return _read_attr(path, fname)
     except Exception as e:
         log(f"⚠️  خطأ أثناء قراءة {path}/{fname}: {e}")
-        return None
+        return -1
+
+# دالة لتحليل عدد صحيح موجب مباشرة من البايتات (capacity من 1 إلى 3 أرقام)
+def _parse_uint(buf) -> Optional[int]:
+    n = 0
+    digits = 0
+    for c in buf:
+        if 48 <= c <= 57:
+            n = n * 10 + c - 48
+            digits += 1
+        else:
+            break
+    return n if digits else None
+
+# قيم status التي يكتبها النواة تختلف في الحرف الأول:
+# Charging / Discharging / Not charging / Full / Unknown → نص مُوحّد بأحرف صغيرة
+STATUS_BY_INITIAL = {
+    ord("C"): "charging",
+    ord("D"): "discharging",
+    ord("N"): "not charging",
+    ord("F"): "full",
+    ord("U"): "unknown",
+}
+
+# ==========================
+# قراءات البطاريات (مصفوفات متوازية)
+# ==========================
+# العنصر i في كل مصفوفة يخص BATTERIES[i]
+BAT_NAMES: List[str] = []
+# النسبة المئوية (-1 = غير معروفة)
+BAT_PERCENTS = array("i")
+# الحالة بأحرف صغيرة
+BAT_STATUSES: List[str] = []
+
+# دالة لتهيئة المصفوفات بحجم قائمة البطاريات الحالية
+def init_battery_arrays() -> None:
+    global BAT_PERCENTS
+    BAT_NAMES[:] = [bat.name for bat in BATTERIES]
+    BAT_PERCENTS = array("i", [-1]) * len(BATTERIES)
+    BAT_STATUSES[:] = [""] * len(BATTERIES)
 
-# دالة لقراءة حالة جميع البطاريات
-def read_all_batteries() -> List[Dict]:
-    results = []
+init_battery_arrays()
+
+# دالة لقراءة حالة جميع البطاريات في المصفوفات مباشرة
+def read_all_batteries() -> None:
     # قراءة كل بطارية
-    for bat in BATTERIES:
-        # قراءة السعة والنسبة المئوية
-        cap = safe_read(bat, "capacity")
-        # قراءة الحالة
-        status = safe_read(bat, "status")
-        try:
-            # تحويل السعة إلى عدد صحيح
-            percent = int(cap) if cap else None
-        except ValueError:
-            log(f"⚠️  قيمة غير رقمية في capacity للبطارية {bat.name}: {cap}")
-            percent = None
-        # تجميع النتائج
-        results.append({
-            "name": bat.name,
-            "percent": percent,
-            "status": (status or "").lower(),
-        })
-    # إرجاع النتائج
-    return results
+    for i, bat in enumerate(BATTERIES):
+        # قراءة السعة وتحليلها من المخزن مباشرة دون إنشاء سلسلة وسيطة
+        n = safe_read_raw(bat, "capacity")
+        percent = _parse_uint(_MV[:n]) if n > 0 else None
+        if n > 0 and percent is None:
+            log(f"⚠️  قيمة غير رقمية في capacity للبطارية {bat.name}: {_BUF[:n].decode(errors='replace').strip()}")
+        # تخزين النتائج في موضع البطارية
+        BAT_PERCENTS[i] = -1 if percent is None else percent
+        # قراءة الحالة (تُطابق بالحرف الأول، وتُفك فقط إن كانت غير معروفة)
+        n = safe_read_raw(bat, "status")
+        BAT_STATUSES[i] = "" if n <= 0 else (
+            STATUS_BY_INITIAL.get(_BUF[0]) or _BUF[:n].decode(errors="replace").strip().lower())
+
+# آخر حالة معروفة لمحولات التيار ووقت قراءتها (مدة الصلاحية AC_RECHECK_SECONDS بجوار INTERVAL_TABLE)
+_last_ac_check_mono = 0.0
+_last_ac_state = False
+
+# دالة لإبطال حالة المحولات المخزنة (تُستدعى عند حدث من محول)
+def invalidate_ac_cache() -> None:
+    global _last_ac_check_mono
+    _last_ac_check_mono = 0.0
 
 # دالة للتحقق مما إذا كان أي بطارية موصولة
-def is_plugged_any(batts: List[Dict]) -> bool:
+def is_plugged_any() -> bool:
+    global _last_ac_check_mono, _last_ac_state
     # التحقق من حالة الشحن في البطاريات
-    for b in batts:
+    for status in BAT_STATUSES:
         # إذا كانت البطارية في حالة شحن أو ممتلئة
-        if b["status"] in ("charging", "full"):
+        if status in ("charging", "full"):
             return True
+    # إعادة استخدام آخر قراءة للمحولات إذا كانت حديثة
+    now = time.monotonic()
+    if _last_ac_check_mono and now - _last_ac_check_mono <= AC_RECHECK_SECONDS:
+        return _last_ac_state
     # التحقق من محولات التيار المتردد
+    state = False
     for a in AC_ADAPTERS:
         # إذا كانت متصلة
-        if safe_read(a, "online") == "1":
-            return True
-    return False
+        if safe_read_raw(a, "online") > 0 and _BUF[0] == 0x31:
+            state = True
+            break
+    _last_ac_check_mono, _last_ac_state = now, state
+    return state
 
 # ==========================
 # التحقق من notify-send
 # ==========================
 NOTIFY_AVAILABLE = bool(shutil.which("notify-send"))
 
+# ==========================
+# libnotify داخل العملية (اتصال D-Bus دائم)
+# ==========================
+HAVE_LIBNOTIFY = False
+if HAVE_GI and not args.no_notify:
+    try:
+        HAVE_LIBNOTIFY = bool(Notify.init("battery_monitor"))
+    except Exception as e:
+        log(f"⚠️  تعذر تهيئة libnotify ({e}) — استخدام notify-send")
+# إشعار واحد محفوظ لكل نوع (يُحدَّث بدل إنشاء جديد)
+NOTIFICATIONS: Dict[str, "Notify.Notification"] = {}
+# دالة لعرض إشعار عبر libnotify
+def _show_libnotify(title: str, message: str, icon_key: str, tm: int, urgency: str) -> None:
+    icon = ICONS.get(icon_key, ICONS["default"])
+    n = NOTIFICATIONS.get(icon_key)
+    if n is None:
+        n = NOTIFICATIONS[icon_key] = Notify.Notification.new(title, message, icon)
+    else:
+        n.update(title, message, icon)
+    n.set_urgency(getattr(Notify.Urgency, urgency.upper(), Notify.Urgency.NORMAL))
+    n.set_timeout(max(tm, 0))
+    n.show()
+
+# بادئات أمر notify-send الجاهزة لكل (نوع الإشعار، الأهمية)
+NOTIFY_ARGS = {
+    (k, u): ("notify-send", "-u", u, "-i", icon)
+    for k, icon in ICONS.items() for u in ("low", "normal", "critical")
+}
+# سلاسل المهلة الشائعة (تُبنى مرة واحدة)
+# (أي مهلة ≤ 0 تعني بدون مهلة → "0")
+TIMEOUT_ARGS = {0: "0", 10000: "10000", 12000: "12000",
+                DEFAULT_TIMEOUT_MS: "0" if DEFAULT_TIMEOUT_MS <= 0 else str(DEFAULT_TIMEOUT_MS)}
+# مهام الإشعار الجارية (الاحتفاظ بمرجع يمنع جمعها قبل انتهائها)
+NOTIFY_TASKS: set = set()
+
+# دالة لتشغيل notify-send وانتظار خروجه داخل حلقة الأحداث (دون حجب الفحص)
+async def _spawn_notify(cmd: Tuple[str, ...], title: str, message: str) -> None:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        log("NOTIFY: %s — %s", title, message)
+        await proc.wait()
+    except Exception as e:
+        log(f"⚠️  فشل إرسال الإشعار: {e}")
+
 # ==========================
 # دالة إرسال الإشعارات
 # ==========================    
@@ -231,23 +608,34 @@ def notify(title: str, message: str, icon_key: str = "default",
            timeout_ms: Optional[int] = None, urgency: str = "normal") -> None:
     # إذا كان الوضع جافًا، فقط سجل الرسالة
     if args.no_notify:
-        log(f"[DRY-RUN] Notify: {title} — {message} (icon={icon_key} timeout={timeout_ms} urgency={urgency})")
+        log("[DRY-RUN] Notify: %s — %s (icon=%s timeout=%s urgency=%s)",
+            title, message, icon_key, timeout_ms, urgency)
         return
-    # بناء أمر notify-send
-    # اختيار الأيقونة
-    icon = ICONS.get(icon_key, ICONS["default"])
     # تعيين المهلة
     tm = DEFAULT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+    # المسار المفضل: libnotify داخل العملية
+    if HAVE_LIBNOTIFY:
+        try:
+            _show_libnotify(title, message, icon_key, tm, urgency)
+            log("NOTIFY: %s — %s", title, message)
+            return
+        except Exception as e:
+            log(f"⚠️  فشل libnotify ({e}) — استخدام notify-send")
+    # بناء أمر notify-send
+    # اختيار البادئة الجاهزة (الأيقونة والأهمية)
+    prefix = NOTIFY_ARGS.get((icon_key, urgency)) or (
+        "notify-send", "-u", urgency, "-i", ICONS.get(icon_key, ICONS["default"]))
     # تحويل المهلة إلى سلسلة (0 تعني بدون مهلة)
-    timeout_arg = "0" if tm <= 0 else str(tm)
+    timeout_arg = TIMEOUT_ARGS.get(tm) or ("0" if tm <= 0 else str(tm))
     # بناء الأمر
-    cmd = ["notify-send", "-u", urgency, "-i", icon, "-t", timeout_arg, title, message]
+    cmd = (*prefix, "-t", timeout_arg, title, message)
     # تنفيذ الأمر
     if NOTIFY_AVAILABLE:
         try:
-            # استدعاء notify-send
-            subprocess.run(cmd, check=False)
-            log(f"NOTIFY: {title} — {message}")
+            # جدولة notify-send كمهمة مستقلة في حلقة الأحداث
+            task = asyncio.get_running_loop().create_task(_spawn_notify(cmd, title, message))
+            NOTIFY_TASKS.add(task)
+            task.add_done_callback(NOTIFY_TASKS.discard)
         except Exception as e:
             log(f"⚠️  فشل إرسال الإشعار: {e}")
     else:
@@ -256,165 +644,299 @@ def notify(title: str, message: str, icon_key: str = "default",
 # ==========================
 # قواعد الإشعارات
 # ==========================
-# التحقق من مستوى البطارية المنخفض
-def check_low(bat: Dict, plugged: bool, notified: bool) -> bool:
-    # الحصول على النسبة المئوية
-    p = bat.get("percent")
-    # إذا كانت النسبة غير معروفة، لا تفعل شيئًا
-    if p is None:
-        return notified
-    # التحقق من البطارية المنخفضة
-    if p <= LOW_THRESHOLD and not plugged and not notified:
-        notify("البطارية منخفضة", f"{bat['name']} عند {p}% — الرجاء توصيل الشاحن.",
-               icon_key="low", timeout_ms=0, urgency="critical")
-        return True
-    # إعادة تعيين الحالة إذا تم توصيل الشاحن أو تجاوز المستوى
-    return False if plugged else notified
-
-# التحقق من مستوى البطارية العالي
-#=========================
-def check_high(bat: Dict, plugged: bool, notified: bool) -> bool:
-    # الحصول على النسبة المئوية
-    p = bat.get("percent")
-    # إذا كانت النسبة غير معروفة، لا تفعل شيئًا
-    if p is None:
-        return notified
-    # التحقق من البطارية العالية
-    if plugged and p >= HIGH_THRESHOLD and not notified:
-        notify("تجنب الشحن الزائد", f"{bat['name']} عند {p}% — يفضل فصل الشاحن.",
-               icon_key="high", timeout_ms=10000)
-        return True
-    # إعادة تعيين الحالة إذا تم فصل الشاحن أو انخفض المستوى
-    return False if not plugged else notified
-
-# التحقق من اقتراب الامتلاء
-# ==========================
-def check_unplug(bat: Dict, plugged: bool, notified: bool) -> bool:
-    # الحصول على النسبة المئوية
-    p = bat.get("percent")
-    # إذا كانت النسبة غير معروفة، لا تفعل شيئًا
-    if p is None:
-        return notified
-    # التحقق من اقتراب الامتلاء
-    if plugged and p >= UNPLUG_THRESHOLD and not notified:
-        notify("اقتراب الامتلاء", f"{bat['name']} عند {p}% — الرجاء فصل الشاحن.",
-               icon_key="unplug", timeout_ms=12000)
-        return True
-    # إعادة تعيين الحالة إذا تم فصل الشاحن أو انخفض المستوى
-    return False if (not plugged or p < UNPLUG_THRESHOLD) else notified
-
-# التحقق من الامتلاء الكامل
-# ==========================
-def check_full(bat: Dict, plugged: bool, notified: bool) -> bool:
-    # الحصول على النسبة المئوية
-    p = bat.get("percent")
+# نصوص وإعدادات كل تنبيه (الأيقونة باسم النوع): (العنوان، القالب، المهلة، الأهمية)
+ALERTS = {
+    "low": ("البطارية منخفضة", "{name} عند {p}% — الرجاء توصيل الشاحن.", 0, "critical"),
+    "high": ("تجنب الشحن الزائد", "{name} عند {p}% — يفضل فصل الشاحن.", 10000, "normal"),
+    "unplug": ("اقتراب الامتلاء", "{name} عند {p}% — الرجاء فصل الشاحن.", 12000, "normal"),
+    "full": ("الشحن مكتمل", "{name} وصل 100% — الرجاء فصل الشاحن.", 0, "critical"),
+}
+
+# دالة لإرسال تنبيه من نوع معيّن
+def _alert(kind: str, name: str, p: int) -> None:
+    title, template, timeout_ms, urgency = ALERTS[kind]
+    notify(title, template.format(name=name, p=p),
+           icon_key=kind, timeout_ms=timeout_ms, urgency=urgency)
+
+# بتات حالة الإشعارات لكل بطارية (عنصر في NOTIFIED)
+LOW_BIT, HIGH_BIT, UNPLUG_BIT, FULL_BIT = 1, 2, 4, 8
+
+# بتات التنبيه بترتيب الإرسال
+ALERT_BITS = ((LOW_BIT, "low"), (HIGH_BIT, "high"), (UNPLUG_BIT, "unplug"), (FULL_BIT, "full"))
+
+# استيراد numba (اختياري) لترجمة نواة التصنيف إلى شيفرة أصلية (هنا وليس في رأس الملف كي لا يُحمَّل مع --show-log)
+try:
+    from numba import njit
+except ImportError:
+    # بدون numba تبقى النواة دالة Python عادية
+    def njit(*_args, **_kwargs):
+        return lambda fn: fn
+
+# نواة التصنيف: أعداد صحيحة فقط ودون تفرع على العتبات
+# تُرجع (بتات الحالة الجديدة، بتات التنبيهات الواجب إرسالها)
+@njit(cache=True)
+def classify_kernel(p, plugged, nb, low, high, unplug, full):
     # إذا كانت النسبة غير معروفة، لا تفعل شيئًا
-    if p is None:
-        return notified
-    # التحقق من الامتلاء الكامل
-    if plugged and p >= FULL_THRESHOLD and not notified:
-        notify("الشحن مكتمل", f"{bat['name']} وصل 100% — الرجاء فصل الشاحن.",
-               icon_key="full", timeout_ms=0, urgency="critical")
-        return True
-    # إعادة تعيين الحالة إذا تم فصل الشاحن أو انخفض المستوى
-    return False if (not plugged or p < FULL_THRESHOLD) else notified
-
-# ==========================
-# تدوير السجل مع إعادة تهيئة handlers
-# ==========================
-# دالة لتدوير ملف السجل إذا تجاوز الحجم 1 ميجابايت
-def rotate_log():
-    # إذا لم يكن ملف السجل مفعّلًا، لا تفعل شيئًا
-    if not LOG_PATH:
-        return
-    try:
-        log_path = Path(LOG_PATH)
-        # التحقق من وجود الملف أولاً
-        if not log_path.exists():
-            return
-        # التحقق من الحجم
-        if log_path.stat().st_size > 1_000_000:
-            backup = LOG_PATH + ".1"
-            Path(backup).unlink(missing_ok=True)
-            log_path.rename(backup)
-            
-            log(f"ℹ️  تم تدوير السجل: {LOG_PATH} → {backup}")
-            log("✅ تم تدوير ملف السجل بنجاح")
-
-            # إعادة تهيئة handlers لإنشاء ملف جديد
-            for handler in logger.handlers[:]:
-                if isinstance(handler, logging.FileHandler):
-                    handler.close()
-                    logger.removeHandler(handler)
-            
-            # إنشاء handler جديد للملف الجديد
-            fh = logging.FileHandler(LOG_PATH, encoding="utf-8")
-            fh.setLevel(logging.INFO)
-            formatter = logging.Formatter("[%(asctime)s] %(message)s")
-            fh.setFormatter(formatter)
-            logger.addHandler(fh)
-            log("✅ تم إنشاء ملف سجل جديد بعد التدوير")
+    if p < 0:
+        return nb, 0
+    pl = 1 if plugged else 0
+    # الشروط المتحققة الآن: المنخفضة دون شاحن، وقواعد الشحن مع الشاحن
+    want = ((1 - pl) * (p <= low) * LOW_BIT
+            | pl * ((p >= high) * HIGH_BIT | (p >= unplug) * UNPLUG_BIT | (p >= full) * FULL_BIT))
+    # بتات تبقى رغم زوال شرطها: المنخفضة حتى التوصيل، والزائد حتى الفصل
+    keep = HIGH_BIT if pl else LOW_BIT
+    return want | (nb & keep), want & ~nb
 
-    except Exception as e:
-        log(f"⚠️  خطأ أثناء تدوير السجل: {e}")
+# دالة موحّدة لتطبيق جميع القواعد على بطارية واحدة؛ تُرجع بتات الحالة الجديدة
+def _classify(name: str, p: int, plugged: bool, nb: int) -> int:
+    nb, actions = classify_kernel(p, plugged, nb, LOW_THRESHOLD, HIGH_THRESHOLD,
+                                  UNPLUG_THRESHOLD, FULL_THRESHOLD)
+    if actions:
+        for bit, kind in ALERT_BITS:
+            if actions & bit:
+                _alert(kind, name, p)
+    return nb
 
 # ==========================
 # فاصل زمني ديناميكي
 # ==========================
-def dynamic_interval(min_percent: int) -> int:
-    if min_percent <= 20:
-        return 20
-    if min_percent <= 40:
-        return 40
-    return CHECK_INTERVAL
+# الفاصل لكل نسبة 0..100 محسوب مسبقًا؛ الموضع 101 يعني عدم وجود نسبة معروفة
+INTERVAL_TABLE = tuple(20 if p <= 20 else 40 if p <= 40 else CHECK_INTERVAL for p in range(102))
+# صلاحية حالة المحولات المخزنة: ضعف أطول فاصل، فتُقرأ online مرة كل دورتين على الأكثر
+# في الوضع الثابت، وفورًا بعد أي حدث من محول (inotify / POLLPRI / UPower)
+AC_RECHECK_SECONDS = 2 * max(INTERVAL_TABLE)
 
 # ==========================
 # تهيئة حالة الإشعارات لكل بطارية
 # ==========================
-def init_notified() -> Dict[str, Dict[str, bool]]:
-    return {
-        bat.name: {"low": False, "high": False, "unplug": False, "full": False}
-        for bat in BATTERIES
-    }
+def init_notified() -> array:
+    return array("B", bytes(len(BATTERIES)))
 
 # ==========================
-# الحلقة الرئيسية
+# إعادة كشف الأجهزة عند تغيّرها
+# ==========================
+# دالة لتحديث قوائم الأجهزة وواصفاتها؛ تُرجع True إذا تغيرت أسماء البطاريات
+def refresh_power_devices() -> bool:
+    global BATTERIES, AC_ADAPTERS, BATTERY_NAMES, TOPOLOGY_DIRTY
+    TOPOLOGY_DIRTY = False
+    BATTERIES, AC_ADAPTERS = detect_power_devices()
+    # إغلاق واصفات الأجهزة التي أُزيلت
+    present = set(BATTERIES + AC_ADAPTERS)
+    for key in [k for k in SYSFS_FDS if k[0] not in present]:
+        _close_attr(key)
+    # مراقبة الأجهزة الجديدة
+    watch_power_devices(BATTERIES + AC_ADAPTERS)
+    open_sysfs_attrs()
+    invalidate_ac_cache()
+    names = frozenset(b.name for b in BATTERIES)
+    init_battery_arrays()
+    if names == BATTERY_NAMES:
+        return False
+    BATTERY_NAMES = names
+    return True
+
+# ==========================
+# دورة فحص واحدة
+# ==========================
+def check_once(notified: array) -> Tuple[array, int]:
+    # إعادة تهيئة الحالة إذا تغيرت البطاريات (يُفحص فقط بعد حدث إضافة/إزالة)
+    if TOPOLOGY_DIRTY and refresh_power_devices():
+        log("⚠️  تغيرت البطاريات — إعادة تهيئة الحالة")
+        notified = init_notified()
+    # قراءة حالة البطاريات
+    read_all_batteries()
+    plugged = is_plugged_any()
+    # أدنى نسبة معروفة (101 = لا توجد)
+    min_p = 101
+    # التحقق من كل بطارية
+    for i, name in enumerate(BAT_NAMES):
+        p = BAT_PERCENTS[i]
+        log("Battery %s: %s%% | status=%s | plugged=%s",
+            name, p if p >= 0 else None, BAT_STATUSES[i], plugged)
+        # التحقق من قواعد الإشعارات
+        notified[i] = _classify(name, p, plugged, notified[i])
+        if 0 <= p < min_p:
+            min_p = p
+    # إرجاع الحالة الجديدة والفاصل الزمني الديناميكي
+    return notified, INTERVAL_TABLE[min_p]
+
+# ==========================
+# تكامل systemd (READY / WATCHDOG)
+# ==========================
+# نصف مهلة WatchdogSec بالثواني (0 إن لم يُفعَّل المراقب)
+WATCHDOG_PING_S = int(os.environ.get("WATCHDOG_USEC", "0") or 0) / 2_000_000
+
+# دالة لإرسال حالة إلى systemd (عبر python-systemd أو مقبس NOTIFY_SOCKET مباشرة)
+def sd_notify(state: str) -> None:
+    if HAVE_SYSTEMD:
+        sd_daemon.notify(state)
+        return
+    addr = os.environ.get("NOTIFY_SOCKET")
+    if not addr:
+        return
+    # العناوين المجردة تبدأ بـ @
+    if addr[0] == "@":
+        addr = "\0" + addr[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.sendto(state.encode(), addr)
+    except OSError as e:
+        log(f"⚠️  تعذر إبلاغ systemd ({state}): {e}")
+
+# ==========================
+# اشتراكات D-Bus
 # ==========================
-def main() -> None:
+UPOWER_NAME = "org.freedesktop.UPower"
+UPOWER_PATH = "/org/freedesktop/UPower"
+UPOWER_DEVICES_PATH = "/org/freedesktop/UPower/devices"
+LOGIN1_PATH = "/org/freedesktop/login1"
+LOGIN1_MANAGER = "org.freedesktop.login1.Manager"
+
+# دالة لإضافة قاعدة مطابقة للإشارات على الناقل
+async def _add_match(bus: "MessageBus", rule: str) -> None:
+    reply = await bus.call(Message(destination="org.freedesktop.DBus", path="/org/freedesktop/DBus",
+                                   interface="org.freedesktop.DBus", member="AddMatch",
+                                   signature="s", body=[rule]))
+    if reply.message_type == MessageType.ERROR:
+        raise RuntimeError(f"AddMatch: {reply.error_name}")
+
+# دالة للاشتراك في إشارات UPower؛ كل إشارة توقظ حلقة الفحص
+async def subscribe_upower(bus: "MessageBus", wake: asyncio.Event) -> None:
+    # التحقق من وجود UPower وتعداد أجهزته
+    reply = await bus.call(Message(destination=UPOWER_NAME, path=UPOWER_PATH,
+                                   interface=UPOWER_NAME, member="EnumerateDevices"))
+    if reply.message_type == MessageType.ERROR:
+        raise RuntimeError(f"EnumerateDevices: {reply.error_name}")
+    log(f"ℹ️  وضع الأحداث: UPower يعرض {len(reply.body[0])} جهازًا")
+    # الاشتراك في PropertiesChanged لكل أجهزة UPower (بما فيها المضافة لاحقًا)
+    await _add_match(bus, f"type='signal',sender='{UPOWER_NAME}',"
+                          "interface='org.freedesktop.DBus.Properties',member='PropertiesChanged',"
+                          f"path_namespace='{UPOWER_DEVICES_PATH}'")
+
+    # دفعات الإشارات المتتالية تندمج في إيقاظ واحد
+    def on_message(msg) -> None:
+        if (msg.message_type == MessageType.SIGNAL and msg.member == "PropertiesChanged"
+                and (msg.path or "").startswith(UPOWER_DEVICES_PATH)):
+            # تغيّر في محول التيار يُبطل حالته المخزنة
+            if "line_power" in msg.path:
+                invalidate_ac_cache()
+            wake.set()
+
+    bus.add_message_handler(on_message)
+
+# دالة للاشتراك في PrepareForSleep من logind لتخطي دورة واحدة بعد الاستئناف
+async def subscribe_sleep(bus: "MessageBus", wake: asyncio.Event, resumed: asyncio.Event) -> None:
+    await _add_match(bus, f"type='signal',interface='{LOGIN1_MANAGER}',"
+                          f"member='PrepareForSleep',path='{LOGIN1_PATH}'")
+
+    def on_message(msg) -> None:
+        if (msg.message_type == MessageType.SIGNAL and msg.member == "PrepareForSleep"
+                and msg.interface == LOGIN1_MANAGER and msg.body and not msg.body[0]):
+            # الاستئناف من السكون: قراءات البطارية لم تستقر بعد
+            resumed.set()
+            wake.set()
+
+    bus.add_message_handler(on_message)
+
+# ==========================
+# مهمة الفحص
+# ==========================
+async def monitor(wake: asyncio.Event, resumed: asyncio.Event, event_driven: bool = False) -> None:
     # تهيئة حالة الإشعارات
     notified = init_notified()
-    # الحلقة الرئيسية
+    interval = CHECK_INTERVAL
     while True:
-        # تدوير السجل إذا لزم الأمر
-        rotate_log()
-        # قراءة حالة البطاريات
-        bats = read_all_batteries()
-        plugged = is_plugged_any(bats)
-
-        # إعادة تهيئة الحالة إذا تغيرت البطاريات
-        current_names = {b["name"] for b in bats}
-        # تحقق من التغيير
-        if set(notified.keys()) != current_names:
-            log("⚠️  تغيرت البطاريات — إعادة تهيئة الحالة")
-            notified = init_notified()
-        # التحقق من كل بطارية
-        for b in bats:
-            # الحصول على اسم البطارية
-            name = b["name"]
-            log(f"Battery {name}: {b['percent']}% | status={b['status']} | plugged={plugged}")
-            # التحقق من قواعد الإشعارات
-            notified[name]["low"] = check_low(b, plugged, notified[name]["low"])
-            notified[name]["high"] = check_high(b, plugged, notified[name]["high"])
-            notified[name]["unplug"] = check_unplug(b, plugged, notified[name]["unplug"])
-            notified[name]["full"] = check_full(b, plugged, notified[name]["full"])
-        # الحصول على أدنى نسبة مئوية للبطاريات المتاحة
-        percents = [b["percent"] for b in bats if b["percent"] is not None]
-        # الحصول على الفاصل الزمني الديناميكي
-        interval = dynamic_interval(min(percents) if percents else CHECK_INTERVAL)
-        # الانتظار للفاصل الزمني المحدد
-        time.sleep(interval)
+        wake.clear()
+        if resumed.is_set():
+            # أول إيقاظ بعد الاستئناف: تخطي دورة لتجنب تنبيه كاذب من قفزة النسبة
+            resumed.clear()
+            log("ℹ️  استئناف من السكون — تخطي دورة فحص واحدة")
+        else:
+            notified, interval = check_once(notified)
+            # وضع الأحداث: UPower يُبلغ بكل تغيير، فالمؤقت مجرد احتياط طويل
+            if event_driven:
+                interval = CHECK_INTERVAL
+        # موعد الفحص التالي
+        due = time.monotonic() + interval
+        # الانتظار حتى حدث (inotify/D-Bus) أو حلول الموعد؛
+        # المهلات القصيرة للمراقب تُرسل النبض فقط دون فحص
+        while True:
+            # نبض مراقب systemd
+            sd_notify("WATCHDOG=1")
+            remaining = due - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, WATCHDOG_PING_S) if WATCHDOG_PING_S else remaining
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=timeout)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+# ==========================
+# الحلقة الرئيسية
+# ==========================
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+    # حدث الإيقاظ المبكر لمهمة الفحص
+    wake = asyncio.Event()
+    # حدث الإيقاف عند SIGTERM/SIGINT
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    # أحداث uevent عبر inotify
+    if INOTIFY_FD is not None:
+        def on_inotify() -> None:
+            drain_inotify()
+            wake.set()
+        loop.add_reader(INOTIFY_FD, on_inotify)
+    # إشعارات POLLPRI من سمات sysfs المفتوحة
+    open_sysfs_attrs()
+    if SYSFS_POLLED:
+        def on_sysfs_change() -> None:
+            drain_sysfs_poll()
+            wake.set()
+        loop.add_reader(SYSFS_POLL.fileno(), on_sysfs_change)
+    # حدث الاستئناف من السكون (PrepareForSleep)
+    resumed = asyncio.Event()
+    # الاتصال بناقل النظام إن توفر dbus-next
+    bus = None
+    event_driven = False
+    if HAVE_DBUS:
+        try:
+            bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+        except Exception as e:
+            log(f"⚠️  تعذر الاتصال بناقل النظام: {e}")
+    elif args.event_driven:
+        log("⚠️  dbus-next غير مثبت — التراجع إلى الفحص الدوري")
+    if bus is not None:
+        # وضع الأحداث: إشارات UPower عبر D-Bus
+        if args.event_driven:
+            try:
+                await subscribe_upower(bus, wake)
+                event_driven = True
+            except Exception as e:
+                log(f"⚠️  فشل وضع الأحداث ({e}) — التراجع إلى الفحص الدوري")
+        # السكون والاستئناف عبر logind
+        try:
+            await subscribe_sleep(bus, wake, resumed)
+        except Exception as e:
+            log(f"⚠️  تعذر الاشتراك في PrepareForSleep: {e}")
+    # تشغيل مهمة الفحص حتى طلب الإيقاف (أو توقفها بخطأ)
+    task = loop.create_task(monitor(wake, resumed, event_driven))
+    task.add_done_callback(lambda _: stop.set())
+    sd_notify("READY=1")
+    await stop.wait()
+    if task.done():
+        # إعادة رفع الخطأ الذي أوقف مهمة الفحص
+        task.result()
+    log("ℹ️  تم استلام إشارة الإيقاف — الخروج")
+    sd_notify("STOPPING=1")
+    task.cancel()
+    if bus is not None:
+        bus.disconnect()
 # ==========================
 # نقطة الدخول الرئيسية
 # ==========================    
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())